@@ -3,21 +3,106 @@ Example usage of the movie database
 Demonstrates common query patterns and data retrieval
 """
 
+import functools
 import psycopg2
-from typing import List, Dict, Optional
+import psycopg2.extras
+import psycopg2.pool
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional
+
+
+# Shared across MovieDatabase instances so repeated instantiation does not
+# pay the full TCP + auth + backend-fork cost of a fresh connection each time
+_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+
+# Hot queries are PREPAREd once per pooled connection so Postgres skips the
+# parse/plan step on every subsequent EXECUTE
+_PREPARED_STATEMENTS = [
+    """
+    PREPARE movie_songs (text) AS
+        SELECT s.song_name, s.song_order
+        FROM songs s
+        JOIN movies m ON s.movie_id = m.movie_id
+        WHERE m.movie_name = $1
+        ORDER BY s.song_order
+    """,
+    """
+    PREPARE movie_commentary (text, text, text) AS
+        SELECT c.commentary_text
+        FROM commentaries c
+        JOIN movies m ON c.movie_id = m.movie_id
+        WHERE m.movie_name = $1
+          AND c.song_id IS NULL
+          AND c.commentary_type = $2
+          AND c.language = $3
+    """,
+    """
+    PREPARE song_commentary (text, text, text) AS
+        SELECT c.commentary_text
+        FROM commentaries c
+        JOIN songs s ON c.song_id = s.song_id
+        WHERE s.song_name = $1
+          AND c.commentary_type = $2
+          AND c.language = $3
+    """,
+    """
+    PREPARE movies_by_actor (text) AS
+        SELECT DISTINCT
+            m.movie_name,
+            m.release_date,
+            m.director
+        FROM movies m
+        JOIN movie_cast mc ON m.movie_id = mc.movie_id
+        JOIN cast_members cm ON mc.cast_id = cm.cast_id
+        WHERE cm.cast_name ILIKE $1
+        ORDER BY m.release_date DESC
+    """,
+]
 
 
 class MovieDatabase:
     """Simple wrapper for movie database queries"""
-    
-    def __init__(self, db_config: Dict[str, str]):
-        self.conn = psycopg2.connect(**db_config)
-        self.cur = self.conn.cursor()
-    
-    def get_all_movies(self) -> List[Dict]:
-        """Get all movies with basic info"""
+
+    def __init__(self, db_config: Dict[str, str], minconn: int = 2, maxconn: int = 20):
+        global _pool
+        if _pool is None:
+            _pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **db_config)
+        self._pool = _pool
+
+        # Cache the read-only lookups per instance; repeat calls with the
+        # same arguments become dict hits instead of Postgres round-trips.
+        # Call invalidate_cache() after loading new data.
+        self.get_movie_songs = functools.lru_cache(maxsize=512)(self._get_movie_songs)
+        self.get_movie_commentary = functools.lru_cache(maxsize=1024)(self._get_movie_commentary)
+        self.get_song_commentary = functools.lru_cache(maxsize=1024)(self._get_song_commentary)
+        self.get_movies_by_actor = functools.lru_cache(maxsize=512)(self._get_movies_by_actor)
+
+    def invalidate_cache(self):
+        """Drop all cached query results (call after loading new data)"""
+        self.get_movie_songs.cache_clear()
+        self.get_movie_commentary.cache_clear()
+        self.get_song_commentary.cache_clear()
+        self.get_movies_by_actor.cache_clear()
+
+    @contextmanager
+    def _conn(self):
+        """Check a connection out of the shared pool, returning it on exit"""
+        conn = self._pool.getconn()
+        try:
+            if not getattr(conn, '_statements_prepared', False):
+                with conn.cursor() as cur:
+                    for statement in _PREPARED_STATEMENTS:
+                        cur.execute(statement)
+                conn.commit()
+                conn._statements_prepared = True
+            yield conn
+        finally:
+            self._pool.putconn(conn)
+
+    def iter_all_movies(self) -> Iterator[Dict]:
+        """Stream all movies with basic info, a batch at a time"""
         query = """
-            SELECT 
+            SELECT
                 m.movie_id,
                 m.movie_name,
                 m.release_date,
@@ -28,74 +113,64 @@ class MovieDatabase:
             LEFT JOIN cast_members cm ON mc.cast_id = cm.cast_id
             GROUP BY m.movie_id
         """
-        
-        self.cur.execute(query)
-        columns = [desc[0] for desc in self.cur.description]
-        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+
+        # A named cursor keeps the result set server-side, so peak memory
+        # is bounded by itersize instead of the full row count
+        with self._conn() as conn:
+            cur = conn.cursor(name='movies_iter', cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.itersize = 1000
+            try:
+                cur.execute(query)
+                yield from cur
+            finally:
+                cur.close()
+                conn.rollback()
+
+    def get_all_movies(self) -> List[Dict]:
+        """Get all movies with basic info"""
+        return list(self.iter_all_movies())
     
-    def get_movie_songs(self, movie_name: str) -> List[Dict]:
+    def _get_movie_songs(self, movie_name: str) -> List[Dict]:
         """Get all songs for a movie in order"""
-        query = """
-            SELECT s.song_name, s.song_order
-            FROM songs s
-            JOIN movies m ON s.movie_id = m.movie_id
-            WHERE m.movie_name = %s
-            ORDER BY s.song_order
-        """
-        
-        self.cur.execute(query, (movie_name,))
-        columns = [desc[0] for desc in self.cur.description]
-        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+        with self._conn() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute("EXECUTE movie_songs (%s)", (movie_name,))
+            return cur.fetchall()
     
-    def get_movie_commentary(
+    def _get_movie_commentary(
         self, 
         movie_name: str, 
         commentary_type: str = 'long',
         language: str = 'Hindi'
     ) -> Optional[str]:
         """Get movie-level commentary"""
-        query = """
-            SELECT c.commentary_text
-            FROM commentaries c
-            JOIN movies m ON c.movie_id = m.movie_id
-            WHERE m.movie_name = %s
-              AND c.song_id IS NULL
-              AND c.commentary_type = %s
-              AND c.language = %s
-        """
-        
-        self.cur.execute(query, (movie_name, commentary_type, language))
-        result = self.cur.fetchone()
-        return result[0] if result else None
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute("EXECUTE movie_commentary (%s, %s, %s)", (movie_name, commentary_type, language))
+            result = cur.fetchone()
+            return result[0] if result else None
     
-    def get_song_commentary(
+    def _get_song_commentary(
         self,
         song_name: str,
         commentary_type: str = 'long',
         language: str = 'Hindi'
     ) -> Optional[str]:
         """Get commentary for a specific song"""
-        query = """
-            SELECT c.commentary_text
-            FROM commentaries c
-            JOIN songs s ON c.song_id = s.song_id
-            WHERE s.song_name = %s
-              AND c.commentary_type = %s
-              AND c.language = %s
-        """
-        
-        self.cur.execute(query, (song_name, commentary_type, language))
-        result = self.cur.fetchone()
-        return result[0] if result else None
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute("EXECUTE song_commentary (%s, %s, %s)", (song_name, commentary_type, language))
+            result = cur.fetchone()
+            return result[0] if result else None
     
-    def search_commentaries(self, keyword: str) -> List[Dict]:
-        """Search for a keyword across all commentaries"""
+    def iter_search_commentaries(self, keyword: str) -> Iterator[Dict]:
+        """Stream keyword matches across all commentaries, best matches first"""
+        # Word-level full-text matching against the generated tsvector,
+        # with the trigram ILIKE path as a fallback for short substrings
+        # and scripts the tsearch parser splits poorly (e.g. Devanagari)
         query = """
-            SELECT 
+            SELECT
                 m.movie_name,
-                CASE 
+                CASE
                     WHEN c.song_id IS NULL THEN 'Movie'
-                    ELSE s.song_name 
+                    ELSE s.song_name
                 END as subject,
                 c.commentary_type,
                 c.language,
@@ -103,64 +178,69 @@ class MovieDatabase:
             FROM commentaries c
             JOIN movies m ON c.movie_id = m.movie_id
             LEFT JOIN songs s ON c.song_id = s.song_id
-            WHERE c.commentary_text ILIKE %s
+            WHERE c.tsv @@ plainto_tsquery('simple', %s)
+               OR c.commentary_text ILIKE %s
+            ORDER BY ts_rank(c.tsv, plainto_tsquery('simple', %s)) DESC
         """
-        
-        self.cur.execute(query, (f'%{keyword}%',))
-        columns = [desc[0] for desc in self.cur.description]
-        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+
+        # Streaming matters here: commentary_text blobs are multi-KB each,
+        # so materializing every match at once gets expensive fast
+        with self._conn() as conn:
+            cur = conn.cursor(name='commentaries_iter', cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.itersize = 1000
+            try:
+                cur.execute(query, (keyword, f'%{keyword}%', keyword))
+                yield from cur
+            finally:
+                cur.close()
+                conn.rollback()
+
+    def search_commentaries(self, keyword: str) -> List[Dict]:
+        """Search for a keyword across all commentaries"""
+        return list(self.iter_search_commentaries(keyword))
     
-    def get_movies_by_actor(self, actor_name: str) -> List[Dict]:
+    def _get_movies_by_actor(self, actor_name: str) -> List[Dict]:
         """Find all movies featuring a specific actor"""
-        query = """
-            SELECT DISTINCT
-                m.movie_name,
-                m.release_date,
-                m.director
-            FROM movies m
-            JOIN movie_cast mc ON m.movie_id = mc.movie_id
-            JOIN cast_members cm ON mc.cast_id = cm.cast_id
-            WHERE cm.cast_name ILIKE %s
-            ORDER BY m.release_date DESC
-        """
-        
-        self.cur.execute(query, (f'%{actor_name}%',))
-        columns = [desc[0] for desc in self.cur.description]
-        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+        with self._conn() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute("EXECUTE movies_by_actor (%s)", (f'%{actor_name}%',))
+            return cur.fetchall()
     
     def get_complete_movie_data(self, movie_name: str) -> Dict:
         """Get all data for a movie in one structured response"""
-        
-        # Get movie info
-        self.cur.execute(
-            "SELECT * FROM movies WHERE movie_name = %s",
-            (movie_name,)
-        )
-        movie_columns = [desc[0] for desc in self.cur.description]
-        movie_data = dict(zip(movie_columns, self.cur.fetchone() or []))
-        
-        if not movie_data:
-            return {}
-        
-        # Add cast, songs, and commentaries
-        movie_data['cast'] = [
-            row[0] for row in self.cur.execute("""
-                SELECT cm.cast_name
-                FROM cast_members cm
-                JOIN movie_cast mc ON cm.cast_id = mc.cast_id
-                WHERE mc.movie_id = %s
-            """, (movie_data['movie_id'],)) or []
-        ]
-        
-        movie_data['songs'] = self.get_movie_songs(movie_name)
-        movie_data['commentary'] = self.get_movie_commentary(movie_name)
-        
-        return movie_data
-    
+        query = """
+            SELECT
+                m.*,
+                (SELECT array_agg(cm.cast_name ORDER BY cm.cast_name)
+                 FROM movie_cast mc
+                 JOIN cast_members cm ON mc.cast_id = cm.cast_id
+                 WHERE mc.movie_id = m.movie_id) as cast,
+                (SELECT json_agg(
+                            json_build_object('song_name', s.song_name, 'song_order', s.song_order)
+                            ORDER BY s.song_order)
+                 FROM songs s
+                 WHERE s.movie_id = m.movie_id) as songs,
+                (SELECT c.commentary_text
+                 FROM commentaries c
+                 WHERE c.movie_id = m.movie_id
+                   AND c.song_id IS NULL
+                   AND c.commentary_type = 'long'
+                   AND c.language = 'Hindi'
+                 LIMIT 1) as commentary
+            FROM movies m
+            WHERE m.movie_name = %s
+        """
+
+        with self._conn() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute(query, (movie_name,))
+            result = cur.fetchone()
+            return dict(result) if result else {}
+
     def close(self):
-        """Close database connection"""
-        self.cur.close()
-        self.conn.close()
+        """Close all pooled connections"""
+        global _pool
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
 
 
 def main():
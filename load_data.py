@@ -2,8 +2,19 @@
 Simple YAML to PostgreSQL loader - ready to run
 """
 
+import io
+import os
 import yaml
 import psycopg2
+
+# libyaml's C parser is several times faster than the pure-Python one;
+# fall back when PyYAML was built without the C extension
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+from concurrent.futures import ProcessPoolExecutor
+from psycopg2.extras import execute_values
 from pathlib import Path
 from datetime import datetime
 
@@ -18,112 +29,210 @@ db_config = {
 
 yaml_directory = './yaml_files'
 
+# Real tables in foreign-key order, and the UNLOGGED staging copies the bulk
+# load writes into before everything is merged in one pass
+TABLE_NAMES = ('movies', 'cast_members', 'movie_cast', 'songs', 'commentaries')
+TABLES = {name: name for name in TABLE_NAMES}
+STAGING_TABLES = {name: name + '_stage' for name in TABLE_NAMES}
 
-def load_yaml_file(filepath, conn):
-    """Load a single YAML file into database"""
-    
-    print(f"\nProcessing: {Path(filepath).name}")
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
-    
-    cur = conn.cursor()
-    
-    # Insert movie
-    release_date = datetime.strptime(data['metadata']['release_date'], '%d %B %Y').date()
-    
-    cur.execute("""
-        INSERT INTO movies (movie_name, release_date, director, producer, music_director, lyricist)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT DO NOTHING
-        RETURNING movie_id
-    """, (
-        data['metadata']['movie_name'],
-        release_date,
-        data['metadata']['director'],
-        data['metadata']['producer'],
-        data['metadata']['music_director'],
-        data['metadata']['lyricist']
-    ))
-    
-    result = cur.fetchone()
-    if result:
-        movie_id = result[0]
-    else:
-        cur.execute("SELECT movie_id FROM movies WHERE movie_name = %s", (data['metadata']['movie_name'],))
-        movie_id = cur.fetchone()[0]
-    
-    print(f"  ✓ Movie inserted (ID: {movie_id})")
-    
-    # Insert cast
-    for cast_name in data['metadata']['cast']:
-        cur.execute("INSERT INTO cast_members (cast_name) VALUES (%s) ON CONFLICT DO NOTHING", (cast_name,))
-        cur.execute("SELECT cast_id FROM cast_members WHERE cast_name = %s", (cast_name,))
-        cast_id = cur.fetchone()[0]
-        cur.execute("INSERT INTO movie_cast (movie_id, cast_id) VALUES (%s, %s) ON CONFLICT DO NOTHING", (movie_id, cast_id))
-    
-    print(f"  ✓ Cast members inserted ({len(data['metadata']['cast'])} actors)")
-    
-    # Insert songs
-    song_mapping = {}
-    for idx, song_name in enumerate(data['songs_order'], start=1):
+
+def create_staging_tables(conn):
+    """Create UNLOGGED staging copies of the real tables.
+
+    Staged rows bypass WAL entirely, and INCLUDING DEFAULTS keeps the real
+    tables' sequences so merged IDs never collide with existing rows. Only
+    the unique constraints the loader's ON CONFLICT clauses rely on are
+    recreated; the search-oriented GIN indexes stay off the ingest path.
+    """
+    with conn.cursor() as cur:
+        for name in reversed(TABLE_NAMES):
+            cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLES[name]}")
+        for name in TABLE_NAMES:
+            cur.execute(f"CREATE UNLOGGED TABLE {STAGING_TABLES[name]} (LIKE {name} INCLUDING DEFAULTS)")
+        cur.execute("ALTER TABLE cast_members_stage ADD UNIQUE (cast_name)")
+        cur.execute("ALTER TABLE movie_cast_stage ADD PRIMARY KEY (movie_id, cast_id)")
+        cur.execute("ALTER TABLE songs_stage ADD UNIQUE (movie_id, song_name)")
+    conn.commit()
+
+
+def merge_staging_tables(conn):
+    """Fold staged rows into the real tables in a single transaction"""
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO movies SELECT * FROM movies_stage ON CONFLICT DO NOTHING")
+        cur.execute("INSERT INTO cast_members SELECT * FROM cast_members_stage ON CONFLICT (cast_name) DO NOTHING")
+        # A staged actor may already exist in cast_members under a different
+        # ID, so remap the links through cast_name
         cur.execute("""
-            INSERT INTO songs (movie_id, song_name, song_order)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (movie_id, song_name) DO UPDATE SET song_order = EXCLUDED.song_order
-            RETURNING song_id
-        """, (movie_id, song_name, idx))
-        song_id = cur.fetchone()[0]
-        song_mapping[song_name] = song_id
-    
-    print(f"  ✓ Songs inserted ({len(song_mapping)} songs)")
-    
-    # Insert commentaries
-    for language, commentary_data in data['commentaries'].items():
-        # Movie commentary
-        movie_commentary_key = list(commentary_data.keys())[0]
-        movie_commentary = commentary_data[movie_commentary_key]
-        
+            INSERT INTO movie_cast (movie_id, cast_id)
+            SELECT st.movie_id, cm.cast_id
+            FROM movie_cast_stage st
+            JOIN cast_members_stage cs ON st.cast_id = cs.cast_id
+            JOIN cast_members cm ON cm.cast_name = cs.cast_name
+            ON CONFLICT DO NOTHING
+        """)
+        cur.execute("INSERT INTO songs SELECT * FROM songs_stage ON CONFLICT (movie_id, song_name) DO NOTHING")
+        # Explicit column list: commentaries.tsv is generated and must not
+        # be assigned, and the stage copy carries it as a plain column
         cur.execute("""
-            INSERT INTO commentaries (movie_id, song_id, commentary_type, language, commentary_text)
-            VALUES (%s, NULL, %s, %s, %s)
-        """, (movie_id, data['commentary_type'], language, movie_commentary))
-        
-        # Song commentaries
-        for song_name, song_id in song_mapping.items():
-            if song_name in commentary_data:
-                cur.execute("""
-                    INSERT INTO commentaries (movie_id, song_id, commentary_type, language, commentary_text)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (movie_id, song_id, data['commentary_type'], language, commentary_data[song_name]))
-    
-    print(f"  ✓ Commentaries inserted (type: {data['commentary_type']})")
-    
+            INSERT INTO commentaries (commentary_id, movie_id, song_id, commentary_type, language, commentary_text, created_at)
+            SELECT commentary_id, movie_id, song_id, commentary_type, language, commentary_text, created_at
+            FROM commentaries_stage
+        """)
+        for name in reversed(TABLE_NAMES):
+            cur.execute(f"DROP TABLE {STAGING_TABLES[name]}")
     conn.commit()
-    cur.close()
+
+
+def _copy_escape(value):
+    """Escape a value for PostgreSQL COPY text format"""
+    if value is None:
+        return r'\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def load_yaml_file(filepath, conn, tables=TABLES):
+    """Load a single YAML file into database
+
+    tables maps logical table names to the physical targets, so the same
+    code can write either to the live tables or the staging copies.
+    """
+
+    print(f"\nProcessing: {Path(filepath).name}")
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=SafeLoader)
+
+    # One transaction per file: commit on success, roll back on any error,
+    # and group the WAL flush instead of fsyncing every commit
+    with conn, conn.cursor() as cur:
+        cur.execute("SET LOCAL synchronous_commit = off")
+
+        # Insert movie
+        release_date = datetime.strptime(data['metadata']['release_date'], '%d %B %Y').date()
+
+        cur.execute(f"""
+            INSERT INTO {tables['movies']} (movie_name, release_date, director, producer, music_director, lyricist)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT DO NOTHING
+            RETURNING movie_id
+        """, (
+            data['metadata']['movie_name'],
+            release_date,
+            data['metadata']['director'],
+            data['metadata']['producer'],
+            data['metadata']['music_director'],
+            data['metadata']['lyricist']
+        ))
+    
+        result = cur.fetchone()
+        if result:
+            movie_id = result[0]
+        else:
+            cur.execute(f"SELECT movie_id FROM {tables['movies']} WHERE movie_name = %s", (data['metadata']['movie_name'],))
+            movie_id = cur.fetchone()[0]
+    
+        print(f"  ✓ Movie inserted (ID: {movie_id})")
+    
+        # Insert cast in one batch, then resolve all IDs with a single lookup
+        cast_names = data['metadata']['cast']
+        execute_values(cur,
+            f"INSERT INTO {tables['cast_members']} (cast_name) VALUES %s ON CONFLICT DO NOTHING",
+            [(name,) for name in cast_names])
+        cur.execute(f"SELECT cast_id, cast_name FROM {tables['cast_members']} WHERE cast_name = ANY(%s)", (cast_names,))
+        cast_ids = {name: cast_id for cast_id, name in cur.fetchall()}
+        execute_values(cur,
+            f"INSERT INTO {tables['movie_cast']} (movie_id, cast_id) VALUES %s ON CONFLICT DO NOTHING",
+            [(movie_id, cast_ids[name]) for name in cast_names])
+
+        print(f"  ✓ Cast members inserted ({len(cast_names)} actors)")
+
+        # Insert songs in one batch; RETURNING hands back the generated IDs
+        song_rows = [(movie_id, song_name, idx) for idx, song_name in enumerate(data['songs_order'], start=1)]
+        returned = execute_values(cur, f"""
+            INSERT INTO {tables['songs']} (movie_id, song_name, song_order)
+            VALUES %s
+            ON CONFLICT (movie_id, song_name) DO UPDATE SET song_order = EXCLUDED.song_order
+            RETURNING song_id, song_name
+        """, song_rows, fetch=True)
+        song_mapping = {song_name: song_id for song_id, song_name in returned}
+
+        print(f"  ✓ Songs inserted ({len(song_mapping)} songs)")
+
+        # Gather commentary rows, then stream them in a single COPY
+        commentary_rows = []
+        for language, commentary_data in data['commentaries'].items():
+            # Movie commentary
+            movie_commentary_key = list(commentary_data.keys())[0]
+            commentary_rows.append(
+                (movie_id, None, data['commentary_type'], language, commentary_data[movie_commentary_key]))
+
+            # Song commentaries
+            for song_name, song_id in song_mapping.items():
+                if song_name in commentary_data:
+                    commentary_rows.append(
+                        (movie_id, song_id, data['commentary_type'], language, commentary_data[song_name]))
+
+        buffer = io.StringIO()
+        for row in commentary_rows:
+            buffer.write('\t'.join(_copy_escape(value) for value in row) + '\n')
+        buffer.seek(0)
+        cur.copy_expert(
+            f"COPY {tables['commentaries']} (movie_id, song_id, commentary_type, language, commentary_text) FROM STDIN",
+            buffer)
+
+        print(f"  ✓ Commentaries inserted (type: {data['commentary_type']})")
+
+
+# Each worker process opens its own connection on first use and keeps it
+# for the files that land on that worker
+_worker_conn = None
+
+
+def _load_one(filepath):
+    """Load one YAML file on this worker's connection, returning (file, error)"""
+    global _worker_conn
+    if _worker_conn is None or _worker_conn.closed:
+        _worker_conn = psycopg2.connect(**db_config)
+
+    # load_yaml_file runs each file as its own transaction and rolls
+    # back on failure, so the connection stays clean for the next file
+    try:
+        load_yaml_file(str(filepath), _worker_conn, tables=STAGING_TABLES)
+        return (str(filepath), None)
+    except Exception as e:
+        return (str(filepath), str(e))
 
 
 def main():
     print("=" * 60)
     print("Loading YAML Data into PostgreSQL")
     print("=" * 60)
-    
-    # Connect to database
-    conn = psycopg2.connect(**db_config)
-    
+
     # Find all YAML files
     yaml_files = list(Path(yaml_directory).glob("*.yaml"))
     print(f"\nFound {len(yaml_files)} YAML files")
-    
-    # Load each file
-    for filepath in yaml_files:
-        try:
-            load_yaml_file(str(filepath), conn)
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-    
+
+    # Workers write into WAL-free staging tables; everything lands in the
+    # live (indexed) tables in one merge pass at the end
+    conn = psycopg2.connect(**db_config)
+    create_staging_tables(conn)
+
+    # Load files in parallel; each file is its own transaction, so one
+    # failure doesn't poison the others
+    max_workers = max(1, min(os.cpu_count() or 1, len(yaml_files)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for filepath, error in executor.map(_load_one, yaml_files):
+            if error:
+                print(f"  ✗ Error in {Path(filepath).name}: {error}")
+
+    print("\nMerging staged rows into live tables...")
+    merge_staging_tables(conn)
     conn.close()
-    
+
     print("\n" + "=" * 60)
     print("✓ All data loaded successfully!")
     print("=" * 60)
@@ -10,6 +10,14 @@ USAGE:
 import yaml
 import psycopg2
 import sys
+from psycopg2.extras import execute_values
+
+# libyaml's C parser is several times faster than the pure-Python one;
+# fall back when PyYAML was built without the C extension
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any
@@ -47,63 +55,72 @@ class DepthBasedLoader:
     
     def load_yaml_file(self, filepath: Path) -> None:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        
-        metadata = data['metadata']
-        movie_name = metadata['movie_name']
-        release_date = datetime.strptime(metadata['release_date'], '%d %B %Y').date()
-        
-        self.cur.execute("""
-            INSERT INTO movies (movie_name, release_date, director, producer, music_director, lyricist)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (movie_name) DO NOTHING
-            RETURNING movie_id
-        """, (movie_name, release_date, metadata['director'], metadata['producer'], 
-              metadata['music_director'], metadata['lyricist']))
+            data = yaml.load(f, Loader=SafeLoader)
+
+        # One transaction per file: commit on success, roll back on any
+        # error, and group the WAL flush instead of fsyncing every commit
+        with self.conn:
+            self.cur.execute("SET LOCAL synchronous_commit = off")
+            metadata = data['metadata']
+            movie_name = metadata['movie_name']
+            release_date = datetime.strptime(metadata['release_date'], '%d %B %Y').date()
         
-        result = self.cur.fetchone()
-        if result:
-            movie_id = result[0]
-            self.movies_created.add(movie_name)
-            print(f"  ✓ Movie: {movie_name} (ID: {movie_id})")
-        else:
-            self.cur.execute("SELECT movie_id FROM movies WHERE movie_name = %s", (movie_name,))
-            movie_id = self.cur.fetchone()[0]
+            self.cur.execute("""
+                INSERT INTO movies (movie_name, release_date, director, producer, music_director, lyricist)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (movie_name) DO NOTHING
+                RETURNING movie_id
+            """, (movie_name, release_date, metadata['director'], metadata['producer'], 
+                  metadata['music_director'], metadata['lyricist']))
         
-        for cast_name in metadata['cast']:
-            self.cur.execute("INSERT INTO cast_members (cast_name) VALUES (%s) ON CONFLICT (cast_name) DO NOTHING", (cast_name,))
-            self.cur.execute("SELECT cast_id FROM cast_members WHERE cast_name = %s", (cast_name,))
-            cast_id = self.cur.fetchone()[0]
-            self.cur.execute("INSERT INTO movie_cast (movie_id, cast_id) VALUES (%s, %s) ON CONFLICT DO NOTHING", (movie_id, cast_id))
+            result = self.cur.fetchone()
+            if result:
+                movie_id = result[0]
+                self.movies_created.add(movie_name)
+                print(f"  ✓ Movie: {movie_name} (ID: {movie_id})")
+            else:
+                self.cur.execute("SELECT movie_id FROM movies WHERE movie_name = %s", (movie_name,))
+                movie_id = self.cur.fetchone()[0]
         
-        song_mapping = {}
-        for idx, song_name in enumerate(data['songs_order'], start=1):
-            self.cur.execute("""
+            # Upsert the whole cast in one statement; the DO UPDATE makes
+            # RETURNING hand back IDs for already-existing rows too
+            returned = execute_values(self.cur, """
+                INSERT INTO cast_members (cast_name)
+                VALUES %s
+                ON CONFLICT (cast_name) DO UPDATE SET cast_name = EXCLUDED.cast_name
+                RETURNING cast_id, cast_name
+            """, [(cast_name,) for cast_name in metadata['cast']], fetch=True)
+            cast_ids = {cast_name: cast_id for cast_id, cast_name in returned}
+            execute_values(self.cur,
+                "INSERT INTO movie_cast (movie_id, cast_id) VALUES %s ON CONFLICT DO NOTHING",
+                [(movie_id, cast_ids[cast_name]) for cast_name in metadata['cast']])
+
+            song_rows = [(movie_id, song_name, idx) for idx, song_name in enumerate(data['songs_order'], start=1)]
+            returned = execute_values(self.cur, """
                 INSERT INTO songs (movie_id, song_name, song_order)
-                VALUES (%s, %s, %s)
+                VALUES %s
                 ON CONFLICT (movie_id, song_name) DO UPDATE SET song_order = EXCLUDED.song_order
-                RETURNING song_id
-            """, (movie_id, song_name, idx))
-            song_id = self.cur.fetchone()[0]
-            song_mapping[song_name] = song_id
+                RETURNING song_id, song_name
+            """, song_rows, fetch=True)
+            song_mapping = {song_name: song_id for song_id, song_name in returned}
         
-        for language, commentary_data in data['commentaries'].items():
-            movie_commentary_key = list(commentary_data.keys())[0]
-            movie_commentary = commentary_data[movie_commentary_key]
-            
-            self.cur.execute("""
+            # Flatten the (language x song) combinations into one batched insert
+            commentary_rows = []
+            for language, commentary_data in data['commentaries'].items():
+                movie_commentary_key = list(commentary_data.keys())[0]
+                commentary_rows.append(
+                    (movie_id, None, data['commentary_type'], language, commentary_data[movie_commentary_key]))
+
+                for song_name, song_id in song_mapping.items():
+                    if song_name in commentary_data:
+                        commentary_rows.append(
+                            (movie_id, song_id, data['commentary_type'], language, commentary_data[song_name]))
+
+            execute_values(self.cur, """
                 INSERT INTO commentaries (movie_id, song_id, commentary_type, language, commentary_text)
-                VALUES (%s, NULL, %s, %s, %s)
-            """, (movie_id, data['commentary_type'], language, movie_commentary))
-            
-            for song_name, song_id in song_mapping.items():
-                if song_name in commentary_data:
-                    self.cur.execute("""
-                        INSERT INTO commentaries (movie_id, song_id, commentary_type, language, commentary_text)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (movie_id, song_id, data['commentary_type'], language, commentary_data[song_name]))
-        
-        self.conn.commit()
+                VALUES %s
+            """, commentary_rows, page_size=500)
+
         self.files_processed += 1
     
     def load_with_depth(self, base_path: str, depth: int) -> None:
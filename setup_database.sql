@@ -51,6 +51,9 @@ CREATE TABLE IF NOT EXISTS commentaries (
     language VARCHAR(50) NOT NULL,
     commentary_text TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Kept in sync by the server for full-text search; the 'simple'
+    -- configuration avoids stemming assumptions across languages
+    tsv tsvector GENERATED ALWAYS AS (to_tsvector('simple', commentary_text)) STORED,
     CHECK (
         (song_id IS NULL AND commentary_text IS NOT NULL) OR
         (song_id IS NOT NULL)
@@ -64,6 +67,17 @@ CREATE INDEX idx_commentaries_movie ON commentaries(movie_id);
 CREATE INDEX idx_commentaries_song ON commentaries(song_id);
 CREATE INDEX idx_commentaries_type ON commentaries(commentary_type);
 
+-- Trigram indexes so leading-wildcard ILIKE searches (commentary keyword
+-- search, actor name lookup) use a bitmap index scan instead of a
+-- sequential scan over the whole table
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_commentaries_text_trgm ON commentaries USING gin (commentary_text gin_trgm_ops);
+CREATE INDEX idx_cast_members_name_trgm ON cast_members USING gin (cast_name gin_trgm_ops);
+
+-- Full-text index over the generated tsvector column for word-level
+-- matching and ts_rank ordering in commentary search
+CREATE INDEX idx_commentaries_tsv ON commentaries USING gin (tsv);
+
 -- Grant permissions to movie_user
 GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO movie_user;
 GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA public TO movie_user;